@@ -0,0 +1,155 @@
+"""
+Benchmark of the batch mode (grades_tracker.batch) on a synthetic cohort.
+
+A local HTTP server stands in for onboard and serves one HTML grades table per
+account, so parse_grades goes through its BeautifulSoup fallback. Each account
+already has a persisted grades file missing a few rows, so every diff finds new
+grades. The batch is run with an increasing number of worker processes and the
+throughput is compared to the single-process run.
+
+Only parse + diff run in the worker processes. Fetching, unpickling the results
+and persisting them (fsyncs, in a thread pool) stay in the parent process, so
+the speedup is bounded by their share of the per-account time (Amdahl's law).
+The mean time per account of each part is reported to make that bound visible.
+
+    python3 benchmarks/bench_batch.py --accounts 500 --rows 120
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grades_tracker import Config, Pipeline  # noqa: E402
+from grades_tracker.batch import iter_batch  # noqa: E402
+
+HEADERS = ["Annee academique", "UE", "Cours", "Epreuve", "Coefficient", "Note"]
+STAND_IN_URL = None
+
+
+def grade_rows(account, rows):
+    return [
+        ["2024-2025", f"UE{i % 7}", f"Cours {account}-{i}", f"Epreuve {i % 3}", str(1 + i % 4), str(i % 20)]
+        for i in range(rows)
+    ]
+
+
+def html_table(account, rows):
+    head = "".join(f"<th>{h}</th>" for h in HEADERS)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>"
+        for row in grade_rows(account, rows)
+    )
+    return f"<html><body><table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></body></html>"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serve /grades/<account> as the HTML export onboard would return.
+    """
+
+    def do_GET(self):
+        body = self.server.pages[self.path.rsplit("/", 1)[-1]]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def stand_in_fetch(ctx):
+    """
+    Replacement for the authenticate/navigate/fetch stages: one GET on the stand-in server.
+    """
+    ctx.common_params = {"lang": "fr"}
+    ctx.payload = requests.get(f"{STAND_IN_URL}/grades/{ctx.config.login}").text
+
+
+def prepare_accounts(directory, accounts, rows, new_rows):
+    """
+    Write the persisted grades of every account, each missing its last `new_rows` rows.
+    """
+    configs = []
+    for i in range(accounts):
+        login = f"student{i:04d}"
+        csv_path = os.path.join(directory, f"grades_{login}.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write(",".join(HEADERS) + "\n")
+            for row in grade_rows(login, rows - new_rows):
+                f.write(",".join(row) + "\n")
+        configs.append(
+            Config(
+                login,
+                "",
+                csv_path=csv_path,
+                history_path=os.path.join(directory, f"history_{login}.jsonl"),
+                journal_path=os.path.join(directory, f"journal_{login}.jsonl"),
+                events_path=os.path.join(directory, f"events_{login}.jsonl"),
+            )
+        )
+    return configs
+
+
+def main():
+    global STAND_IN_URL
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=120, help="Grades per account")
+    parser.add_argument("--new-rows", type=int, default=3, help="Grades missing from the persisted files")
+    parser.add_argument("--fetch-workers", type=int, default=16)
+    parser.add_argument("--processes", type=int, nargs="*", help="Process counts to compare (default: 1, 2, 4... up to CPU count)")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    process_counts = args.processes or sorted({1, cpus} | {2 ** k for k in range(1, cpus.bit_length()) if 2 ** k <= cpus})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.pages = {
+        f"student{i:04d}": html_table(f"student{i:04d}", args.rows).encode("utf-8") for i in range(args.accounts)
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    STAND_IN_URL = f"http://127.0.0.1:{server.server_port}"
+
+    pipeline = (
+        Pipeline()
+        .without("authenticate", "navigate", "notify")
+        .replace("fetch", stand_in_fetch)
+    )
+
+    print(f"{args.accounts} accounts x {args.rows} grades, {cpus} CPU(s), stand-in at {STAND_IN_URL}")
+    print(
+        f"{'processes':>9}  {'seconds':>8}  {'accounts/s':>10}  {'speedup':>7}  {'efficiency':>10}  "
+        f"{'parse+diff':>10}  {'persist':>8}"
+    )
+    baseline = None
+    for processes in process_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            configs = prepare_accounts(directory, args.accounts, args.rows, args.new_rows)
+            start = time.perf_counter()
+            results = list(iter_batch(configs, pipeline, args.fetch_workers, processes))
+            elapsed = time.perf_counter() - start
+        assert len(results) == args.accounts
+        assert all(len(ctx.diff) == args.new_rows for ctx in results)
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        cpu_ms = 1000 * sum(ctx.timings["parse"] + ctx.timings["diff"] for ctx in results) / len(results)
+        persist_ms = 1000 * sum(ctx.timings["persist"] for ctx in results) / len(results)
+        print(
+            f"{processes:>9}  {elapsed:>8.2f}  {args.accounts / elapsed:>10.1f}  "
+            f"{speedup:>6.2f}x  {speedup / processes:>9.0%}  {cpu_ms:>8.1f}ms  {persist_ms:>6.1f}ms"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Core library shared by the entry points of onboard-grades-tracker.
+
+The tracker runs as a pipeline of individually timed stages:
+recover -> authenticate -> navigate -> fetch -> parse -> diff -> persist -> notify.
+"""
+from .config import Config, load_config
+from .events import EventLog
+from .onboard import LoginError
+from .parsing import parse_grades
+from .pipeline import Context, Pipeline, Stage, run, run_or_exit
+
+__all__ = [
+    "Config",
+    "Context",
+    "EventLog",
+    "LoginError",
+    "Pipeline",
+    "Stage",
+    "load_config",
+    "parse_grades",
+    "run",
+    "run_or_exit",
+]
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+from dataclasses import replace
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from .config import DIR_FILE
+from .log import forward_worker_logs
+from .onboard import LoginError
+from .pipeline import Context, Pipeline, format_timings
+from .ratelimit import RateLimiter, format_metrics
+
+# I/O-bound stages run in threads, CPU-bound ones in worker processes
+FETCH_STAGES = ("recover", "authenticate", "navigate", "fetch")
+CPU_STAGES = ("parse", "diff")
+
+DEFAULT_FETCH_WORKERS = 8
+DEFAULT_PERSIST_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+def load_accounts(accounts_path, base_config):
+    """
+    Build one Config per account listed in a JSON file.
+    Each entry overrides the fields of `base_config` (at least "login" and "password");
+    the grades, history, journal and events files default to per-account names next to the entry points.
+    """
+    with open(accounts_path, encoding="utf-8") as f:
+        accounts = json.load(f)
+
+    configs = []
+    for account in accounts:
+        values = {
+            "csv_path": os.path.join(DIR_FILE, f"grades_{account['login']}.csv"),
+            "history_path": os.path.join(DIR_FILE, f"grades_history_{account['login']}.jsonl"),
+            "journal_path": os.path.join(DIR_FILE, f"grades_journal_{account['login']}.jsonl"),
+            "events_path": os.path.join(DIR_FILE, f"grades_events_{account['login']}.jsonl"),
+            **account,
+        }
+        configs.append(replace(base_config, **values))
+    return configs
+
+
+def run_cpu_stages(stages, ctx):
+    """
+    Worker process entry point: run the parse and diff stages on a fetched Context.
+    The raw payload and the previous grades are dropped before the Context is sent
+    back to the parent, only the diff, the events and the new grades are needed to
+    persist and notify.
+    """
+    Pipeline(stages).run(ctx)
+    ctx.payload = None
+    ctx.old_grades = None
+    return ctx
+
+
+def iter_batch(
+    configs,
+    pipeline=None,
+    fetch_workers=DEFAULT_FETCH_WORKERS,
+    processes=None,
+    limiter=None,
+    persist_workers=DEFAULT_PERSIST_WORKERS,
+):
+    """
+    Run the pipeline for many accounts and yield each final Context as soon as it is done.
+
+    Fetches run in a thread pool (I/O-bound). As soon as a payload arrives it is handed to a
+    process pool for parse + diff (CPU-bound, would otherwise serialize on the GIL).
+    Results are then persisted and notified in a second thread pool, so the fsyncs of one
+    account do not hold back the handling of the next results.
+    An account whose stages raise (login, navigation, parsing...) is reported and skipped.
+    All the fetch threads share `limiter`, by default the one configured for the first account.
+    """
+    pipeline = pipeline or Pipeline()
+    fetch_pipeline = pipeline.only(*FETCH_STAGES)
+    cpu_stages = pipeline.only(*CPU_STAGES).stages
+    finish_pipeline = pipeline.without(*FETCH_STAGES, *CPU_STAGES)
+    if limiter is None and configs:
+        limiter = RateLimiter.from_config(configs[0])
+
+    with forward_worker_logs() as (initializer, initargs), ThreadPoolExecutor(fetch_workers) as threads, \
+            ProcessPoolExecutor(processes, initializer=initializer, initargs=initargs) as pool, \
+            ThreadPoolExecutor(persist_workers) as persisters:
+        owners = {}
+        for config in configs:
+            ctx = Context(config=config, limiter=limiter)
+            owners[threads.submit(fetch_pipeline.run, ctx)] = ("fetch", config)
+
+        pending = set(owners)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, config = owners.pop(future)
+                try:
+                    ctx = future.result()
+                except LoginError as e:
+                    logger.error("%s: %s", config.login, e)
+                    continue
+                except Exception:
+                    logger.exception("%s: %s stages failed, account skipped.", config.login, kind)
+                    continue
+
+                if kind == "fetch":
+                    # The session and limiter stay in this process, the workers only need the payload
+                    ctx.session = None
+                    ctx.limiter = None
+                    next_future = pool.submit(run_cpu_stages, cpu_stages, ctx)
+                    owners[next_future] = ("cpu", config)
+                    pending.add(next_future)
+                elif kind == "cpu":
+                    for stage in cpu_stages:
+                        for hook in pipeline.hooks:
+                            hook(stage.name, ctx, ctx.timings[stage.name])
+                    next_future = persisters.submit(finish_pipeline.run, ctx)
+                    owners[next_future] = ("persist", config)
+                    pending.add(next_future)
+                else:
+                    yield ctx
+
+
+def run_batch(configs, pipeline=None, fetch_workers=DEFAULT_FETCH_WORKERS, processes=None):
+    """
+    Run the pipeline for every account and return the list of final Contexts.
+    """
+    limiter = RateLimiter.from_config(configs[0]) if configs else None
+    results = []
+    for ctx in iter_batch(configs, pipeline, fetch_workers, processes, limiter):
+        logger.info("%s: %d new grades (%s)", ctx.config.login, len(ctx.diff), format_timings(ctx.timings))
+        results.append(ctx)
+    if limiter is not None:
+        logger.info("Rate limiter: %s", format_metrics(limiter.metrics()))
+    return results
@@ -0,0 +1,87 @@
+import os
+from dataclasses import dataclass
+
+from .log import DEFAULT_BACKUPS, DEFAULT_MAX_BYTES
+from .ratelimit import parse_host_rates
+
+# Base URL for the onboard platform
+BASE = "https://onboard.ec-nantes.fr"
+LOGIN_URL = f"{BASE}/login"  # Login endpoint
+MENU_URL = f"{BASE}/faces/MainMenuPage.xhtml"  # Main menu page
+GRADES_URL = f"{BASE}/faces/ChoixDonnee.xhtml"  # Grades page
+
+# Root of the repository, where the entry points and the CSV file for storing grades live
+DIR_FILE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(DIR_FILE, "grades.csv")
+# Diff history served by server.py (one JSON object per detected change)
+HISTORY_PATH = os.path.join(DIR_FILE, "grades_history.jsonl")
+# Journal of the notifications not sent yet, replayed by the next run after a crash
+JOURNAL_PATH = os.path.join(DIR_FILE, "grades_journal.jsonl")
+# Append-only change feed (added/updated/removed rows), streamed by server.py
+EVENTS_PATH = os.path.join(DIR_FILE, "grades_events.jsonl")
+
+
+@dataclass
+class Config:
+    """
+    Settings shared by every pipeline stage.
+    """
+    login: str
+    password: str
+    smtp_server: str = None
+    smtp_port: str = None
+    smtp_password: str = None
+    sender_email: str = None
+    receiver_email: str = None
+    csv_path: str = CSV_PATH
+    history_path: str = HISTORY_PATH
+    journal_path: str = JOURNAL_PATH
+    events_path: str = EVENTS_PATH
+    # Politeness budget: requests per second, globally and per host (None for no limit)
+    rate_limit: float = None
+    rate_burst: float = None
+    host_rate_limits: dict = None
+    # Directory of the shared bucket files, to share the budget between processes
+    rate_limit_dir: str = None
+    # Logging: rotating log file (None for stdout only), level and rotation size
+    log_path: str = None
+    log_level: str = "INFO"
+    log_max_bytes: int = DEFAULT_MAX_BYTES
+    log_backups: int = DEFAULT_BACKUPS
+
+
+def load_config(use_dotenv=True, strict=False, **overrides):
+    """
+    Build a Config from the environment.
+    With `use_dotenv`, variables from a .env file are loaded first (local deployment).
+    With `strict`, every variable is required, as in the GitHub workflow where they come from secrets.
+    """
+    if use_dotenv:
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    getenv = os.environ.__getitem__ if strict else os.getenv
+    values = {
+        "login": getenv("LOGIN"),
+        "password": getenv("PASSWORD"),
+        "smtp_server": getenv("SMTP_SERVER"),
+        "smtp_port": getenv("SMTP_PORT"),
+        "smtp_password": getenv("SMTP_PASSWORD"),
+        "sender_email": getenv("SENDER_EMAIL"),
+        "receiver_email": getenv("RECEIVER_EMAIL"),
+    }
+    # Rate limiting and logging settings are optional in every deployment mode
+    values.update(
+        {
+            "rate_limit": float(os.getenv("RATE_LIMIT")) if os.getenv("RATE_LIMIT") else None,
+            "rate_burst": float(os.getenv("RATE_LIMIT_BURST")) if os.getenv("RATE_LIMIT_BURST") else None,
+            "host_rate_limits": parse_host_rates(os.getenv("RATE_LIMIT_HOSTS")),
+            "rate_limit_dir": os.getenv("RATE_LIMIT_DIR"),
+            "log_path": os.getenv("LOG_FILE"),
+            "log_level": os.getenv("LOG_LEVEL", "INFO"),
+            "log_max_bytes": int(os.getenv("LOG_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            "log_backups": int(os.getenv("LOG_BACKUPS", DEFAULT_BACKUPS)),
+        }
+    )
+    values.update(overrides)
+    return Config(**values)
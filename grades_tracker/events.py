@@ -0,0 +1,133 @@
+import json
+import os
+from datetime import datetime, timezone
+
+from .keys import comparable_value, compare_cols, grade_key
+
+
+def _event(kind, row, cols, detected_at, previous=None):
+    event = {
+        "type": kind,
+        "detected_at": detected_at,
+        "key": {col: row.get(col) for col in cols},
+        "values": row,
+    }
+    if previous is not None:
+        event["previous"] = previous
+    return event
+
+
+def _by_key(rows, cols):
+    """
+    Index rows by (key, occurrence): rows sharing a key (e.g. two grades for the
+    same test) are matched by their position among the rows with that key.
+    """
+    occurrences = {}
+    keyed = {}
+    for row in rows:
+        key = grade_key(row, cols)
+        occurrence = occurrences.get(key, 0)
+        occurrences[key] = occurrence + 1
+        keyed[key, occurrence] = row
+    return keyed
+
+
+def change_events(new_grades, old_grades, lang):
+    """
+    Compare the new grades with the persisted ones row by row and return the
+    changes as events: "added" and "removed" rows, and "updated" rows whose key
+    exists on both sides with different values (with their "previous" values).
+    Values are compared normalized, so the strings of the HTML export match
+    the numbers and empty cells of the persisted CSV.
+    """
+    if new_grades is None or new_grades.empty:
+        return []
+    cols = compare_cols(lang)
+    detected_at = datetime.now(timezone.utc).isoformat()
+    new_rows = json.loads(new_grades.to_json(orient="records", force_ascii=False))
+    old_rows = [] if old_grades is None else json.loads(old_grades.to_json(orient="records", force_ascii=False))
+    old_by_key = _by_key(old_rows, cols)
+
+    events = []
+    seen = set()
+    for key, row in _by_key(new_rows, cols).items():
+        seen.add(key)
+        old = old_by_key.get(key)
+        if old is None:
+            events.append(_event("added", row, cols, detected_at))
+        elif any(comparable_value(value) != comparable_value(old.get(col)) for col, value in row.items()):
+            events.append(_event("updated", row, cols, detected_at, previous=old))
+    for key, row in old_by_key.items():
+        if key not in seen:
+            events.append(_event("removed", row, cols, detected_at))
+    return events
+
+
+class EventLog:
+    """
+    Append-only change feed (JSON lines).
+
+    The offset of an event is the byte position right after its line, so a
+    consumer resumes by passing back the last offset it processed: reading
+    from it is a seek, whatever the size of the log.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, events):
+        """
+        Append the events in a single write, fsync it and return the new end offset.
+        If a crash left the last line torn, the events start on a line of their own.
+        """
+        data = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events).encode("utf-8")
+        with open(self.path, "a+b") as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def end_offset(self):
+        """
+        Return the offset after the last event.
+        """
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def check_offset(self, offset):
+        """
+        Raise ValueError unless `offset` is the start of the log or the end of an event.
+        """
+        if offset < 0 or offset > self.end_offset():
+            raise ValueError(f"Offset {offset} is out of the event log")
+        if offset > 0:
+            with open(self.path, "rb") as f:
+                f.seek(offset - 1)
+                if f.read(1) != b"\n":
+                    raise ValueError(f"Offset {offset} is not at an event boundary")
+
+    def read(self, offset=0):
+        """
+        Yield (offset, event) for every complete event written after `offset`.
+        Lines torn by a crash during an append are skipped.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Event still being written, it will be read on the next call
+                    break
+                offset += len(line)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                yield offset, event
@@ -0,0 +1,34 @@
+import math
+
+
+def compare_cols(lang):
+    """
+    Return the columns identifying a grade, in the language of the platform.
+    """
+    if lang == "fr":
+        return ["anneeacademique", "ue", "cours", "epreuve"]
+    return ["academicyear", "ue", "course", "test"]
+
+
+def comparable_value(value):
+    """
+    Normalize a cell so that a value parsed from the HTML export ("12.50", "")
+    compares equal to the same value loaded back from the CSV file (12.5, NaN).
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return None if math.isnan(number) else number
+
+
+def grade_key(row, cols):
+    """
+    Key identifying a grade row (dict or Series), comparable across JSON and CSV round trips.
+    """
+    return tuple(comparable_value(row.get(col)) for col in cols)
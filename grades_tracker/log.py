@@ -0,0 +1,144 @@
+import atexit
+import contextlib
+import logging
+import multiprocessing
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+DEFAULT_MAX_BYTES = 1_000_000
+DEFAULT_BACKUPS = 3
+# Records waiting to be written; beyond this, new records are dropped instead of blocking
+QUEUE_SIZE = 10_000
+
+_listener = None
+_queue_handler = None
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller: when the queue is full the record is dropped.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _log_uncaught(exc_type, exc_value, exc_traceback):
+    """
+    sys.excepthook: write uncaught exceptions to the log instead of stderr only.
+    """
+    if issubclass(exc_type, KeyboardInterrupt):
+        sys.__excepthook__(exc_type, exc_value, exc_traceback)
+        return
+    logging.getLogger().critical("Uncaught exception", exc_info=(exc_type, exc_value, exc_traceback))
+
+
+def setup_logging(log_path=None, level="INFO", max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+    """
+    Configure the root logger for an entry point.
+
+    Records go through a bounded in-memory queue; a background thread writes them
+    to stdout and, if `log_path` is given, to a size-based rotating file. Parse
+    diagnostics are logged at DEBUG level, so they are only written with level="DEBUG".
+    Uncaught exceptions are logged too.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_path:
+        handlers.append(RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(QUEUE_SIZE)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _queue_handler = BoundedQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(log_queue, *handlers)
+    _listener.start()
+    sys.excepthook = _log_uncaught
+
+
+def stop_logging():
+    """
+    Flush the queued records and stop the background writer.
+    The number of records dropped because the queue was full is then written
+    directly to the handlers, so lost log lines leave a trace.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    if _queue_handler is not None and _queue_handler.dropped:
+        record = logging.getLogger(__name__).makeRecord(
+            __name__, logging.WARNING, __file__, 0, "%d log records dropped (queue full)", (_queue_handler.dropped,), None
+        )
+        for handler in _listener.handlers:
+            handler.handle(record)
+        _queue_handler.dropped = 0
+    _listener = None
+_queue_handler = None
+
+
+atexit.register(stop_logging)
+
+
+def setup_logging_from_config(config):
+    """
+    Configure logging from the log_* fields of a Config.
+    """
+    setup_logging(config.log_path, config.log_level, config.log_max_bytes, config.log_backups)
+
+
+class _ForwardHandler(logging.Handler):
+    """
+    Hand the records received from worker processes to the loggers of this process.
+    """
+
+    def handle(self, record):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+        return True
+
+
+def init_worker_logging(log_queue, level):
+    """
+    Process pool initializer: send every record of the worker to the parent through `log_queue`.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(BoundedQueueHandler(log_queue))
+    root.setLevel(level)
+
+
+@contextlib.contextmanager
+def forward_worker_logs():
+    """
+    Collect the logs of worker processes into the logging of this process.
+    Yield the (initializer, initargs) to pass to the process pool.
+    """
+    log_queue = multiprocessing.Queue(QUEUE_SIZE)
+    listener = QueueListener(log_queue, _ForwardHandler())
+    listener.start()
+    try:
+        yield init_worker_logging, (log_queue, logging.getLogger().getEffectiveLevel())
+    finally:
+        listener.stop()
+        log_queue.close()
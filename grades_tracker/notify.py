@@ -0,0 +1,50 @@
+import logging
+import smtplib
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+logger = logging.getLogger(__name__)
+
+
+def send_email(new_grades, config):
+    """
+    Envoie un email avec les nouvelles notes détectées.
+    Renvoie True si l'email a été envoyé.
+    """
+    subject = "Nouvelles notes détectées"
+
+    # Construct the email body
+    body = "Bonjour,\n\nLes nouvelles notes suivantes ont été détectées :\n\n"
+    for _, row in new_grades.iterrows():
+        # Use normalized column names (lowercase, no spaces, no accents)
+        cours = row.get('cours', row.get('course', 'N/A'))
+        note = row.get('note', row.get('grade', 'N/A'))
+        body += f"- Matière : {cours}, Note : {note}\n"
+    body += "\nCordialement,\nVotre script de suivi des notes."
+
+    # Email configuration
+    msg = MIMEMultipart()
+    msg["From"] = config.sender_email
+    msg["To"] = config.receiver_email
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "plain"))
+
+    # Send the email
+    try:
+        if config.smtp_port == "465":  # SSL
+            with smtplib.SMTP_SSL(config.smtp_server, config.smtp_port) as server:
+                server.login(config.sender_email, config.smtp_password)
+                server.sendmail(config.sender_email, config.receiver_email, msg.as_string())
+        elif config.smtp_port == "587":  # STARTTLS
+            with smtplib.SMTP(config.smtp_server, config.smtp_port) as server:
+                server.starttls()
+                server.login(config.sender_email, config.smtp_password)
+                server.sendmail(config.sender_email, config.receiver_email, msg.as_string())
+        else:
+            raise ValueError(f"Invalid SMTP port: {config.smtp_port}. Use 465 for SSL or 587 for STARTTLS.")
+
+        logger.info("Email sent successfully.")
+        return True
+    except Exception as e:
+        logger.error("Error sending email: %s", e)
+        return False
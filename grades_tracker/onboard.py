@@ -0,0 +1,155 @@
+import warnings
+warnings.filterwarnings("ignore", module="urllib3")
+import logging
+import re
+
+import requests
+from bs4 import BeautifulSoup
+
+from .config import BASE, GRADES_URL, LOGIN_URL, MENU_URL
+from .parsing import remove_accents
+from .ratelimit import RateLimitedAdapter
+
+logger = logging.getLogger(__name__)
+
+# Submenus to open, in order, before the years of the grades menu are listed
+SUBMENU_SCHOOLING = "submenu_692908"  # "My Schooling"
+SUBMENU_GRADES = "submenu_3755060"  # "Grades"
+
+# Regex to find the ids linked to the menus for years
+regex_menu_id_years = re.compile(r"form:sidebar_menuid':'(\d+_\d+_\d+)'.*?<span[^>]*>\s*\d+-\d+\s*</span>")
+
+
+class LoginError(Exception):
+    """
+    Raised when the onboard platform cannot be reached or rejects the credentials.
+    """
+
+
+def new_session(limiter=None):
+    """
+    Create a requests session with the headers expected by the onboard platform.
+    If a RateLimiter is given, every request of the session waits for its token.
+    """
+    session = requests.Session()
+    if limiter is not None:
+        adapter = RateLimitedAdapter(limiter)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    session.headers.update(
+        {
+            "User-Agent": "Mozilla/5.0",
+            "Accept": "*/*",
+            "Accept-Language": "fr-FR,fr;q=0.9",
+            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "Origin": BASE,
+            "Referer": BASE + "/",
+        }
+    )
+    return session
+
+
+def get_input_value(soup, name):
+    """
+    Extract the value of an input field by its name from the HTML soup.
+    """
+    tag = soup.find("input", {"name": name})
+    return tag["value"] if tag and "value" in tag.attrs else ""
+
+
+def login(session, username, password):
+    """
+    Perform login to the onboard platform using the provided session.
+    Check if the login was successful by verifying the presence of specific elements on the page.
+    Raise LoginError if there is no internet connection or the credentials are rejected.
+    """
+    try:
+        logger.info("Logging in to the onboard platform...")
+        response = session.post(
+            LOGIN_URL, data={"username": username, "password": password, "j_idt27": ""}
+        )
+        response.raise_for_status()
+
+        # Check if login was successful by looking for a specific element on the menu page
+        if "form:idInit" not in response.text:
+            raise LoginError("Login failed: Invalid credentials or unexpected response.")
+
+        logger.info("Login successful.")
+        return session.get(MENU_URL)
+    except requests.exceptions.ConnectionError:
+        raise LoginError("Error: No internet connection. Please check your network and try again.")
+    except requests.exceptions.RequestException as e:
+        raise LoginError(f"An error occurred during login: {e}")
+
+
+def get_common_params(soup):
+    """
+    Extract common parameters like ViewState, idInit, and lang from the HTML soup.
+    """
+    viewstate = get_input_value(soup, "javax.faces.ViewState")
+    id_init = get_input_value(soup, "form:idInit")
+    lang = soup.find("html").get("lang", "fr")
+    return {
+        "form": "form",
+        "form:largeurDivCenter": "457",
+        "form:idInit": id_init,
+        "form:sauvegarde": "",
+        "form:j_idt827_input": "44323",
+        "javax.faces.ViewState": viewstate,
+        "lang": lang,
+    }
+
+
+def ajax_sidebar(session: requests.Session, submenu_id: str, common_params: dict, ajax_headers: dict):
+    """
+    Perform an AJAX request to open a specific submenu on the onboard platform.
+    """
+    payload = {
+        **common_params,
+        "javax.faces.partial.ajax": "true",
+        "javax.faces.source": "form:j_idt52",
+        "javax.faces.partial.execute": "form:j_idt52",
+        "javax.faces.partial.render": "form:sidebar",
+        "javax.faces.behavior.event": "action",
+        "javax.faces.partial.event": "action",
+        "form:j_idt52": "form:j_idt52",
+        "webscolaapp.Sidebar.ID_SUBMENU": submenu_id,
+    }
+    resp_ajax = session.post(MENU_URL, data=payload, headers=ajax_headers)
+    resp_ajax.raise_for_status()
+    return resp_ajax
+
+
+def find_menu_id_for_last_year(partial_text_response):
+    """
+    Extract the menu ID corresponding to the last year from the partial response.
+    """
+    list_matches = list(regex_menu_id_years.finditer(partial_text_response))
+    if list_matches:
+        return list_matches[-1].group(1)
+    else:
+        raise ValueError("No match found for year options")
+
+
+def download_grades(session, common_params, menu_id):
+    """
+    Download the grades CSV file from the onboard platform.
+    """
+    payload_final = {
+        **common_params,
+        "form:sidebar": "form:sidebar",
+        "form:sidebar_menuid": menu_id,
+    }
+    resp_grades = session.post(MENU_URL, data=payload_final)
+    resp_grades.raise_for_status()
+    soup_grades = BeautifulSoup(resp_grades.text, "html.parser")
+    form = soup_grades.find("form", id="form")
+    payload_download = {
+        inp.get("name") or inp.get("id"): inp.get("value", "")
+        for inp in form.find_all("input")
+    }
+    payload_download["form:j_idt159"] = "form:j_idt159"
+    payload_download["form:largeurDivCenter"] = "457"
+    payload_download["form:j_idt181_reflowDD"] = "0_0"
+    response = session.post(GRADES_URL, data=payload_download)
+    return remove_accents(response.content.decode(encoding="windows-1252"))
@@ -0,0 +1,159 @@
+import logging
+import unicodedata
+from io import StringIO
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+
+def remove_accents(text):
+    """
+    Remove accents from a given text by normalizing it.
+    """
+    text = unicodedata.normalize("NFD", text)
+    return "".join(c for c in text if unicodedata.category(c) != "Mn")
+
+
+def clean_column_name(col):
+    """
+    Normalize a column name: clean up encoding issues, remove accents and spaces, lowercase.
+    """
+    # Replace common encoding artifacts
+    col = col.replace("A©", "e").replace("A‰", "e").replace("A ", "a")
+    # Remove accents
+    col = remove_accents(col)
+    # Remove spaces
+    col = col.replace(" ", "").lower()
+    return col
+
+
+def parse_grades(csv_content):
+    """
+    Parse the grades CSV content into a pandas DataFrame.
+    Handles both CSV format and HTML table format (site may have changed).
+    """
+    csv_str = (csv_content or "").strip()
+    if not csv_str:
+        logger.info("parse_grades: empty response (no CSV content).")
+        return pd.DataFrame()
+
+    # If we received HTML, try to extract a table from it
+    if csv_str.lstrip().startswith("<"):
+        logger.debug("parse_grades: received HTML response. Attempting to extract table...")
+        try:
+            # Parse HTML and look for tables
+            soup = BeautifulSoup(csv_str, "html.parser")
+            tables = soup.find_all("table")
+            
+            if not tables:
+                logger.warning("parse_grades: no HTML table found in response.")
+                return pd.DataFrame()
+            
+            logger.debug("parse_grades: found %d table(s) in HTML. Searching for valid grades table...", len(tables))
+            
+            # Try to manually extract rows and columns from each table
+            for table_idx, table in enumerate(tables):
+                try:
+                    # Extract headers from <th> or first <tr>
+                    headers = []
+                    header_row = table.find("thead")
+                    if header_row:
+                        header_cells = header_row.find_all("th")
+                        headers = [cell.get_text(strip=True) for cell in header_cells]
+                    else:
+                        # Try first row as headers
+                        first_row = table.find("tr")
+                        if first_row:
+                            header_cells = first_row.find_all(["th", "td"])
+                            headers = [cell.get_text(strip=True) for cell in header_cells]
+                    
+                    if not headers:
+                        logger.debug("parse_grades: table %d: no headers found, skipping.", table_idx)
+                        continue
+                    
+                    # Clean headers: remove "Filter by ...", extract only the main part
+                    cleaned_headers = []
+                    for h in headers:
+                        # Remove "Filter by XYZ" suffix
+                        if "Filter by" in h:
+                            h = h.split("Filter by")[0].strip()
+                        cleaned_headers.append(h)
+                    
+                    # Filter out empty header strings
+                    cleaned_headers = [h for h in cleaned_headers if h]
+                    if not cleaned_headers:
+                        logger.debug("parse_grades: table %d: all headers are empty after cleaning, skipping.", table_idx)
+                        continue
+                    
+                    logger.debug("parse_grades: table %d: found headers (cleaned): %s", table_idx, cleaned_headers)
+                    
+                    # Extract data rows
+                    rows = []
+                    tbody = table.find("tbody") or table
+                    tbody_rows = tbody.find_all("tr")
+                    
+                    # Determine starting index: skip the first row only if it's a header row (contains <th>)
+                    start_idx = 0
+                    if tbody_rows and tbody_rows[0].find("th"):
+                        # First row has <th>, so it's a header row, skip it
+                        start_idx = 1
+                    
+                    for tr in tbody_rows[start_idx:]:
+                        cells = tr.find_all(["td", "th"])
+                        row_data = [cell.get_text(strip=True) for cell in cells]
+                        if row_data and len(row_data) > 0:
+                            # Pad or trim row data to match header count
+                            if len(row_data) < len(cleaned_headers):
+                                row_data.extend([""] * (len(cleaned_headers) - len(row_data)))
+                            elif len(row_data) > len(cleaned_headers):
+                                row_data = row_data[:len(cleaned_headers)]
+                            rows.append(row_data)
+                    
+                    logger.debug("parse_grades: table %d: extracted %d data rows.", table_idx, len(rows))
+                    
+                    if rows:
+                        # Create DataFrame
+                        df = pd.DataFrame(rows, columns=cleaned_headers)
+                        if not df.empty:
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug("parse_grades: table %d: successfully extracted %d rows and %d columns.", table_idx, len(df), len(df.columns))
+                                logger.debug("parse_grades: table %d: columns = %s", table_idx, list(df.columns))
+                                logger.debug("parse_grades: table %d: first row = %s", table_idx, df.iloc[0].to_dict())
+                            
+                            # Check if this looks like a grades table
+                            # Simple heuristic: if it has 4+ columns and one of them contains "Note", "Cours", or similar, it's likely a grades table
+                            if len(df.columns) >= 4:
+                                logger.debug("parse_grades: table %d: has %d columns (>= 4), looks like a valid grades table, using it.", table_idx, len(df.columns))
+                                return df
+                            else:
+                                logger.debug("parse_grades: table %d: has only %d columns, continuing search.", table_idx, len(df.columns))
+                    else:
+                        logger.debug("parse_grades: table %d: no data rows extracted.", table_idx)
+                except Exception as ex:
+                    logger.debug("parse_grades: table %d: error extracting rows: %s", table_idx, ex)
+                    continue
+            
+            logger.warning("parse_grades: could not find a valid grades table in any of the HTML tables.")
+            return pd.DataFrame()
+        except Exception as e:
+            logger.warning("parse_grades: error parsing HTML: %s", e)
+            return pd.DataFrame()
+
+    # Otherwise, try standard CSV parsing
+    # If the expected separator is not present, it's probably not the CSV we expect
+    first_line = csv_str.splitlines()[0]
+    if ";" not in first_line:
+        logger.info("parse_grades: no ';' separator found in CSV header — treating as no grades.")
+        return pd.DataFrame()
+
+    try:
+        csv_buffer = StringIO(csv_content)
+        return pd.read_csv(csv_buffer, sep=";")
+    except pd.errors.EmptyDataError:
+        logger.info("parse_grades: pandas reported EmptyDataError — no grades.")
+        return pd.DataFrame()
+    except pd.errors.ParserError as e:
+        logger.warning("parse_grades: ParserError reading CSV: %s — treating as no grades.", e)
+        return pd.DataFrame()
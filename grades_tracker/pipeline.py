@@ -0,0 +1,239 @@
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from . import onboard, parsing, storage
+from .events import EventLog, change_events
+from .keys import compare_cols, grade_key
+from .notify import send_email
+from .log import setup_logging_from_config
+from .ratelimit import RateLimiter, format_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Context:
+    """
+    State threaded through the pipeline stages. Each stage reads the fields
+    filled by the previous ones and sets its own.
+    """
+    config: object
+    limiter: object = None
+    session: object = None
+    common_params: dict = None
+    ajax_headers: dict = None
+    menu_id: str = None
+    payload: str = None
+    grades: pd.DataFrame = None
+    old_grades: pd.DataFrame = None
+    diff: pd.DataFrame = None
+    # Rows of the diff still to notify (the diff minus the rows recovered from the journal)
+    unnotified: pd.DataFrame = None
+    created: bool = False
+    recovered: list = field(default_factory=list)
+    journal_entry: str = None
+    events: list = field(default_factory=list)
+    timings: dict = field(default_factory=dict)
+
+    @property
+    def lang(self):
+        return self.common_params["lang"] if self.common_params else "fr"
+
+
+def recover(ctx):
+    """
+    Resume an interrupted run: send the notifications left pending in the journal.
+    Their rows are remembered so that this run does not notify them again.
+    The journal stays locked meanwhile, so a concurrent run does not send them too.
+    """
+    with storage.Journal(ctx.config.journal_path).lock() as journal:
+        for entry in journal.pending():
+            logger.info("Resuming %d pending notification(s) from the journal.", len(entry["rows"]))
+            ctx.recovered.extend(entry["rows"])
+            if send_email(pd.DataFrame(entry["rows"]), ctx.config):
+                journal.commit(entry["id"])
+
+
+def authenticate(ctx):
+    """
+    Log in and extract the common parameters from the main menu page.
+    """
+    ctx.session = ctx.session or onboard.new_session(ctx.limiter)
+    resp_get = onboard.login(ctx.session, ctx.config.login, ctx.config.password)
+    soup = BeautifulSoup(resp_get.text, "html.parser")
+    ctx.common_params = onboard.get_common_params(soup)
+    ctx.ajax_headers = {**ctx.session.headers, "Faces-Request": "partial/ajax"}
+
+
+def navigate(ctx):
+    """
+    Open the "My Schooling" then "Grades" submenus and find the menu of the last year.
+    """
+    logger.info("Downloading grades...")
+    onboard.ajax_sidebar(ctx.session, onboard.SUBMENU_SCHOOLING, ctx.common_params, ctx.ajax_headers)
+    partial_text_response = onboard.ajax_sidebar(
+        ctx.session, onboard.SUBMENU_GRADES, ctx.common_params, ctx.ajax_headers
+    ).text
+    ctx.menu_id = onboard.find_menu_id_for_last_year(partial_text_response)
+
+
+def fetch(ctx):
+    """
+    Download the raw grades export.
+    """
+    ctx.payload = onboard.download_grades(ctx.session, ctx.common_params, ctx.menu_id)
+
+
+def parse(ctx):
+    """
+    Parse the raw export into a DataFrame.
+    """
+    ctx.grades = parsing.parse_grades(ctx.payload)
+
+
+def diff(ctx):
+    """
+    Compare the parsed grades with the persisted ones.
+    Rows already notified by `recover` stay in the diff (their run may have crashed
+    before saving them) but are not notified again.
+    """
+    if ctx.grades is not None and not ctx.grades.empty:
+        ctx.old_grades = storage.load_grades(ctx.config.csv_path, ctx.lang)
+    ctx.created = ctx.old_grades is None
+    ctx.diff = storage.diff_grades(ctx.grades, ctx.old_grades, ctx.lang)
+    ctx.events = change_events(ctx.grades, ctx.old_grades, ctx.lang)
+    ctx.unnotified = ctx.diff
+    if ctx.recovered and not ctx.diff.empty:
+        cols = compare_cols(ctx.lang)
+        recovered_keys = {grade_key(row, cols) for row in ctx.recovered}
+        ctx.unnotified = ctx.diff[[grade_key(row, cols) not in recovered_keys for _, row in ctx.diff.iterrows()]]
+
+
+def persist(ctx):
+    """
+    Save the grades, publish the change events and record the new grades in the history.
+    The notification is journaled, and the events and history written, before the
+    grades file is replaced: if the run crashes in between, the next run finds the
+    same diff again, so nothing is lost (events and history entries may then be
+    written twice, consumers should treat them as at-least-once).
+    """
+    if ctx.grades is None or ctx.grades.empty:
+        return
+    if not ctx.unnotified.empty:
+        ctx.journal_entry = storage.Journal(ctx.config.journal_path).begin(ctx.unnotified)
+    if ctx.events:
+        EventLog(ctx.config.events_path).append(ctx.events)
+        logger.info("Published %d change event(s).", len(ctx.events))
+    if not ctx.diff.empty:
+        storage.append_history(ctx.diff, ctx.config.history_path)
+    storage.save_grades(ctx.grades, ctx.config.csv_path)
+    if not ctx.diff.empty and not ctx.created:
+        logger.info("File updated with new grades.")
+
+
+def notify(ctx):
+    """
+    Send an email if new grades are detected, then mark the journal entry as done.
+    If the email fails, the entry stays pending and the next run sends it again.
+    """
+    if not ctx.unnotified.empty and send_email(ctx.unnotified, ctx.config) and ctx.journal_entry:
+        storage.Journal(ctx.config.journal_path).commit(ctx.journal_entry)
+
+
+@dataclass
+class Stage:
+    name: str
+    run: object
+
+
+DEFAULT_STAGES = [
+    Stage("recover", recover),
+    Stage("authenticate", authenticate),
+    Stage("navigate", navigate),
+    Stage("fetch", fetch),
+    Stage("parse", parse),
+    Stage("diff", diff),
+    Stage("persist", persist),
+    Stage("notify", notify),
+]
+
+
+class Pipeline:
+    """
+    Ordered list of stages run on a shared Context.
+    Each stage is timed; the durations are stored in `Context.timings`.
+    Hooks are called as `hook(stage_name, ctx, elapsed)` after every stage,
+    so instrumentation can be plugged in without touching the stages.
+    """
+
+    def __init__(self, stages=None, hooks=None):
+        self.stages = list(DEFAULT_STAGES if stages is None else stages)
+        self.hooks = list(hooks or [])
+
+    def replace(self, name, run):
+        """
+        Return a copy of the pipeline where the stage `name` runs `run` instead.
+        """
+        if name not in [stage.name for stage in self.stages]:
+            raise KeyError(f"Unknown stage: {name}")
+        stages = [Stage(name, run) if stage.name == name else stage for stage in self.stages]
+        return Pipeline(stages, self.hooks)
+
+    def only(self, *names):
+        """
+        Return a copy of the pipeline restricted to the given stages, in pipeline order.
+        """
+        return Pipeline([stage for stage in self.stages if stage.name in names], self.hooks)
+
+    def without(self, *names):
+        """
+        Return a copy of the pipeline without the given stages.
+        """
+        return Pipeline([stage for stage in self.stages if stage.name not in names], self.hooks)
+
+    def run(self, ctx):
+        for stage in self.stages:
+            start = time.perf_counter()
+            stage.run(ctx)
+            elapsed = time.perf_counter() - start
+            ctx.timings[stage.name] = elapsed
+            for hook in self.hooks:
+                hook(stage.name, ctx, elapsed)
+        return ctx
+
+
+def format_timings(timings):
+    """
+    Format the stage durations on a single line.
+    """
+    return ", ".join(f"{name}={elapsed:.3f}s" for name, elapsed in timings.items())
+
+
+def run(config, pipeline=None):
+    """
+    Run the whole pipeline for `config` and return the final Context.
+    """
+    ctx = Context(config=config, limiter=RateLimiter.from_config(config))
+    (pipeline or Pipeline()).run(ctx)
+    logger.info("Stage timings: %s", format_timings(ctx.timings))
+    if ctx.limiter is not None:
+        logger.info("Rate limiter: %s", format_metrics(ctx.limiter.metrics()))
+    return ctx
+
+
+def run_or_exit(config, pipeline=None):
+    """
+    Entry point helper: configure logging, run the pipeline and exit with status 1
+    if onboard is unreachable or rejects the credentials.
+    """
+    setup_logging_from_config(config)
+    try:
+        return run(config, pipeline)
+    except onboard.LoginError as e:
+        logger.error("%s", e)
+        sys.exit(1)
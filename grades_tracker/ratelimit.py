@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets can only be shared between threads
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket shared by the threads of this process.
+    `rate` tokens are added per second, up to `capacity` (the allowed burst).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens, updated, now):
+        """
+        Refill the bucket and take one token, possibly going into debt.
+        Return the new state and how long the caller must wait for its token.
+        """
+        # A clock stepped backwards must not drain the bucket
+        elapsed = max(0.0, now - updated)
+        tokens = min(self.capacity, tokens + elapsed * self.rate) - 1
+        return tokens, now, max(0.0, -tokens / self.rate)
+
+    def reserve(self):
+        """
+        Reserve a token and return the delay (seconds) before it may be used.
+        """
+        with self._lock:
+            self.tokens, self.updated, delay = self._take(self.tokens, self.updated, time.monotonic())
+        return delay
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a file locked with flock,
+    so that it is shared by every process on the machine (cron runs, batch workers).
+    """
+
+    def __init__(self, rate, capacity, state_path):
+        super().__init__(rate, capacity)
+        self.state_path = state_path
+
+    def _load(self, content, now):
+        """
+        Parse the saved state. A missing or corrupted state (e.g. a write cut
+        short by a crash) starts a fresh, full bucket instead of failing every request.
+        """
+        try:
+            state = json.loads(content)
+            return float(state["tokens"]), float(state["updated"])
+        except (ValueError, KeyError, TypeError):
+            if content:
+                logger.warning("Rate limiter: unreadable state in %s, bucket reset.", self.state_path)
+            return self.capacity, now
+
+    def reserve(self):
+        # The lock is held on the state file itself, so it is rewritten in place
+        # rather than replaced (a renamed file would no longer be the locked one).
+        with self._lock, open(self.state_path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            content = f.read()
+            # Wall-clock time: monotonic clocks have an arbitrary origin per
+            # process/boot and cannot be compared across the processes sharing the file
+            now = time.time()
+            tokens, updated, delay = self._take(*self._load(content, now), now)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({"tokens": tokens, "updated": updated}))
+            f.flush()
+        return delay
+
+
+class RateLimiter:
+    """
+    Politeness budget for the requests sent to onboard.
+    Every request takes a token from the global bucket and from the bucket of its host.
+    The time spent waiting for tokens is recorded so concurrency can be tuned.
+    """
+
+    def __init__(self, rate=None, burst=None, host_rates=None, state_dir=None):
+        self.burst = burst
+        self.host_rates = dict(host_rates or {})
+        self.state_dir = state_dir
+        if state_dir and fcntl is None:
+            logger.warning("Rate limiter: file locking unavailable, buckets are only shared within this process.")
+            self.state_dir = None
+        self.global_bucket = self._new_bucket("global", rate) if rate else None
+        self._host_buckets = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build the limiter configured in `config`, or None if no limit is set.
+        """
+        if not config.rate_limit and not config.host_rate_limits:
+            return None
+        return cls(config.rate_limit, config.rate_burst, config.host_rate_limits, config.rate_limit_dir)
+
+    def _new_bucket(self, name, rate):
+        if self.state_dir:
+            os.makedirs(self.state_dir, exist_ok=True)
+            return SharedTokenBucket(rate, self.burst, os.path.join(self.state_dir, f"ratelimit_{name}.json"))
+        return TokenBucket(rate, self.burst)
+
+    def _host_bucket(self, host):
+        with self._lock:
+            if host not in self._host_buckets:
+                rate = self.host_rates.get(host)
+                self._host_buckets[host] = self._new_bucket(host, rate) if rate else None
+            return self._host_buckets[host]
+
+    def acquire(self, host):
+        """
+        Block until a request to `host` is allowed and return the time waited.
+        """
+        buckets = [bucket for bucket in (self.global_bucket, self._host_bucket(host)) if bucket]
+        delay = max([bucket.reserve() for bucket in buckets], default=0.0)
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            stats = self._stats.setdefault(host, {"requests": 0, "queued": 0, "total_wait": 0.0, "max_wait": 0.0})
+            stats["requests"] += 1
+            stats["queued"] += delay > 0
+            stats["total_wait"] += delay
+            stats["max_wait"] = max(stats["max_wait"], delay)
+        return delay
+
+    def metrics(self):
+        """
+        Return the queueing delay statistics, per host and overall.
+        """
+        with self._lock:
+            hosts = {host: dict(stats) for host, stats in self._stats.items()}
+        total = {
+            "requests": sum(stats["requests"] for stats in hosts.values()),
+            "queued": sum(stats["queued"] for stats in hosts.values()),
+            "total_wait": sum(stats["total_wait"] for stats in hosts.values()),
+            "max_wait": max([stats["max_wait"] for stats in hosts.values()], default=0.0),
+        }
+        return {**total, "hosts": hosts}
+
+
+def format_metrics(metrics):
+    """
+    Format the limiter metrics on a single line.
+    """
+    requests = metrics["requests"]
+    mean_wait = metrics["total_wait"] / requests if requests else 0.0
+    return (
+        f"{requests} requests, {metrics['queued']} queued, "
+        f"wait total={metrics['total_wait']:.3f}s mean={mean_wait:.3f}s max={metrics['max_wait']:.3f}s"
+    )
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Transport adapter taking a token from the limiter before every request of the session.
+    """
+
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire(urlparse(request.url).hostname)
+        return super().send(request, **kwargs)
+
+
+def parse_host_rates(value):
+    """
+    Parse "host=rate,host=rate" into a dict.
+    """
+    host_rates = {}
+    for item in (value or "").split(","):
+        if item.strip():
+            host, rate = item.split("=", 1)
+            host_rates[host.strip()] = float(rate)
+    return host_rates
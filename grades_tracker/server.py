@@ -0,0 +1,299 @@
+import argparse
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from .config import CSV_PATH, EVENTS_PATH, HISTORY_PATH
+from .events import EventLog
+from .log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+# How often the event stream checks the log for new events, and sends a keep-alive comment
+EVENTS_POLL_INTERVAL = 0.5
+EVENTS_KEEPALIVE_INTERVAL = 15
+
+
+def file_signature(path):
+    """
+    Return a cheap signature (mtime, size) of a file, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def read_grades(csv_path):
+    """
+    Read the persisted grades into a JSON-serializable dict.
+    """
+    grades = pd.read_csv(csv_path)
+    return {
+        "columns": list(grades.columns),
+        "rows": json.loads(grades.to_json(orient="records", force_ascii=False)),
+    }
+
+
+def read_history(history_path):
+    """
+    Read the diff history (one JSON object per line) written by the persist stage.
+    """
+    entries = []
+    with open(history_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # Line torn by a crash during the append, the rest of the history is still valid
+                continue
+    return entries
+
+
+class GradesStore:
+    """
+    Serve the files persisted by the scraper as JSON documents.
+    Each document is rebuilt only when the underlying files change, so
+    repeated requests cost a stat() call and never touch onboard.
+    """
+
+    def __init__(self, csv_path=CSV_PATH, history_path=HISTORY_PATH):
+        self.csv_path = csv_path
+        self.history_path = history_path
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    # Files each document is built from: its cache key and Last-Modified only depend on them
+    sources = {"grades": ("csv_path",), "history": ("history_path",), "metadata": ("csv_path", "history_path")}
+
+    def _signature(self, name):
+        return tuple(file_signature(getattr(self, attr)) for attr in self.sources.get(name, ()))
+
+    def _build(self, name):
+        grades_sig = file_signature(self.csv_path)
+        history_sig = file_signature(self.history_path)
+        if name == "grades":
+            if grades_sig is None:
+                return None
+            payload = read_grades(self.csv_path)
+        elif name == "history":
+            payload = read_history(self.history_path) if history_sig else []
+        elif name == "metadata":
+            if grades_sig is None:
+                return None
+            grades = self.get("grades")
+            history = self.get("history")
+            payload = {
+                "rows": len(grades["payload"]["rows"]),
+                "columns": grades["payload"]["columns"],
+                "grades_etag": grades["etag"],
+                "grades_last_modified": email.utils.formatdate(grades["mtime"], usegmt=True),
+                "history_entries": len(history["payload"]),
+            }
+        else:
+            return None
+
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        mtimes = [sig[0] / 1e9 for sig in self._signature(name) if sig is not None]
+        return {
+            "payload": payload,
+            "body": body,
+            "etag": '"' + hashlib.sha256(body).hexdigest() + '"',
+            "mtime": max(mtimes) if mtimes else 0,
+        }
+
+    def get(self, name):
+        """
+        Return the cached document for `name` ("grades", "history" or "metadata"),
+        rebuilding it if the persisted files changed since the last call.
+        """
+        signature = self._signature(name)
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        document = self._build(name)
+        with self._lock:
+            self._cache[name] = (signature, document)
+        return document
+
+
+class GradesRequestHandler(BaseHTTPRequestHandler):
+    """
+    Read-only JSON API over the GradesStore of the server,
+    and change feed over its EventLog (/events).
+    """
+
+    routes = {"/grades": "grades", "/history": "history", "/metadata": "metadata"}
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def do_HEAD(self):
+        self.do_GET(send_body=False)
+
+    def do_GET(self, send_body=True):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/events":
+            self.send_events(send_body)
+            return
+        name = self.routes.get(path)
+        if name is None:
+            self.send_error(404, "Unknown endpoint")
+            return
+        try:
+            document = self.server.store.get(name)
+        except (OSError, ValueError, pd.errors.ParserError) as e:
+            self.send_error(503, f"Could not read persisted grades: {e}")
+            return
+        if document is None:
+            self.send_error(404, "No grades persisted yet")
+            return
+
+        last_modified = email.utils.formatdate(document["mtime"], usegmt=True)
+        if self.not_modified(document):
+            self.send_response(304)
+            self.send_header("ETag", document["etag"])
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(document["body"])))
+        self.send_header("ETag", document["etag"])
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(document["body"])
+
+    def send_events(self, send_body=True):
+        """
+        Send the change events after the requested offset (`?offset=N`, or the
+        Last-Event-ID header when an EventSource reconnects).
+        With `Accept: text/event-stream` the connection stays open and new events
+        are pushed as Server-Sent Events whose id is the offset to resume from.
+        Otherwise the pending events are returned as JSON with the next offset.
+        """
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            offset = int(query.get("offset", [self.headers.get("Last-Event-ID") or 0])[0])
+            self.server.event_log.check_offset(offset)
+        except ValueError as e:
+            self.send_error(400, f"Invalid offset: {e}")
+            return
+        event_log = self.server.event_log
+
+        if "text/event-stream" not in self.headers.get("Accept", ""):
+            events = []
+            try:
+                for offset, event in event_log.read(offset):
+                    events.append(event)
+            except (OSError, ValueError) as e:
+                self.send_error(503, f"Could not read the event log: {e}")
+                return
+            body = json.dumps({"events": events, "offset": offset}, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if not send_body:
+            return
+        last_write = time.monotonic()
+        try:
+            while True:
+                # Only read the log when it grew past the offset of the consumer
+                if event_log.end_offset() > offset:
+                    for offset, event in event_log.read(offset):
+                        data = json.dumps(event, ensure_ascii=False)
+                        self.wfile.write(f"id: {offset}\nevent: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+                elif time.monotonic() - last_write > EVENTS_KEEPALIVE_INTERVAL:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+                time.sleep(EVENTS_POLL_INTERVAL)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        except (OSError, ValueError):
+            # The consumer reconnects with the Last-Event-ID of the last event it received
+            logger.exception("Cannot read the event log, event stream closed.")
+
+    def not_modified(self, document):
+        """
+        Evaluate the conditional request headers. If-None-Match takes precedence
+        over If-Modified-Since, as required by RFC 9110.
+        """
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or document["etag"] in tags or ("W/" + document["etag"]) in tags
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(document["mtime"]) <= since
+        return False
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, csv_path=CSV_PATH, history_path=HISTORY_PATH, events_path=EVENTS_PATH):
+    """
+    Start the read-only HTTP API and block until interrupted.
+    """
+    server = ThreadingHTTPServer((host, port), GradesRequestHandler)
+    server.store = GradesStore(csv_path, history_path)
+    server.event_log = EventLog(events_path)
+    logger.info("Serving cached grades on http://%s:%d", host, server.server_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    """
+    Parse command line arguments and start the server.
+    """
+    parser = argparse.ArgumentParser(description="Serve the persisted grades as a read-only JSON API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--csv", default=CSV_PATH, help="Path to grades.csv")
+    parser.add_argument("--history", default=HISTORY_PATH, help="Path to the diff history file")
+    parser.add_argument("--events", default=EVENTS_PATH, help="Path to the change events log")
+    args = parser.parse_args()
+    setup_logging(os.getenv("LOG_FILE"), os.getenv("LOG_LEVEL", "INFO"))
+    serve(args.host, args.port, args.csv, args.history, args.events)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from .keys import compare_cols
+from .parsing import clean_column_name
+
+try:
+    import fcntl
+except ImportError:  # Windows: the journal can only be locked between threads
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def load_grades(csv_path, lang):
+    """
+    Load the persisted grades with normalized column names in the language of the platform.
+    Return None if no grades have been saved yet.
+    """
+    if not os.path.exists(csv_path):
+        return None
+    old_grades = pd.read_csv(csv_path)
+    # Normalize column names in old_grades too
+    old_grades.columns = [clean_column_name(col) for col in old_grades.columns]
+
+    if lang == "fr":
+        return old_grades.rename(
+            columns={
+                "academicyear": "anneeacademique",
+                "course": "cours",
+                "test": "epreuve",
+                "coefficient": "coefficient",
+                "grade": "note",
+            }
+        )
+    return old_grades.rename(
+        columns={
+            "anneeacademique": "academicyear",
+            "cours": "course",
+            "epreuve": "test",
+            "coefficient": "coefficient",
+            "note": "grade",
+        }
+    )
+
+
+def diff_grades(new_grades, old_grades, lang):
+    """
+    Compare the new grades with the existing ones.
+    The column names of `new_grades` are normalized in place.
+    Return the rows of `new_grades` that are not in `old_grades` (all of them if `old_grades` is None).
+    """
+    logger.info("Comparing grades...")
+    # If parsing produced an empty DataFrame, there are no grades to compare
+    if new_grades is None or new_grades.empty:
+        logger.info("No grades found for the latest year (page exists but contains no notes). Nothing to save or compare.")
+        # Return an empty DataFrame to signal 'no new grades'
+        return pd.DataFrame()
+
+    # Normalize column names: clean up encoding issues and remove spaces
+    new_grades.columns = [clean_column_name(col) for col in new_grades.columns]
+
+    if old_grades is None:
+        logger.info("Initial file created.")
+        return new_grades
+
+    COMPARE_COLS = compare_cols(lang)
+    old_compare = old_grades[COMPARE_COLS].copy()
+    new_compare = new_grades[COMPARE_COLS].copy()
+
+    # Detect new rows in the new grades
+    merged = new_compare.merge(old_compare, how="outer", indicator=True)
+    diff_compare = merged[merged["_merge"] == "left_only"].drop(columns=["_merge"])
+
+    mask = (
+        new_grades[COMPARE_COLS]
+        .apply(
+            lambda row: (
+                row[COMPARE_COLS[0]],
+                row[COMPARE_COLS[1]],
+                row[COMPARE_COLS[2]],
+                row[COMPARE_COLS[3]],
+            ),
+            axis=1,
+        )
+        .isin(
+            diff_compare.apply(
+                lambda row: (
+                    row[COMPARE_COLS[0]],
+                    row[COMPARE_COLS[1]],
+                    row[COMPARE_COLS[2]],
+                    row[COMPARE_COLS[3]],
+                ),
+                axis=1,
+            )
+        )
+    )
+    diff = new_grades[mask]
+    if diff.empty:
+        logger.info("No new grades.")
+    else:
+        logger.info("%d new grades detected:\n%s", len(diff), diff.to_string(index=False))
+    return diff
+
+
+def fsync_directory(path):
+    """
+    Flush the directory entry of `path` so a rename survives a power loss (no-op on Windows).
+    """
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, content):
+    """
+    Replace the content of `path` atomically: write a temporary file in the same
+    directory, fsync it, then rename it over `path`. Readers and crashed runs only
+    ever see the old or the new content, never a partial file.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        # mkstemp creates the file as 0600, keep the permissions of the replaced file
+        mode = stat.S_IMODE(os.stat(path).st_mode) if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_directory(path)
+
+
+def append_line(path, line):
+    """
+    Append one line to `path` and fsync it.
+    If a crash left the last line torn, the new line starts on a line of its own,
+    so that readers skipping the torn line do not lose this one too.
+    """
+    data = (line + "\n").encode("utf-8")
+    with open(path, "a+b") as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def save_grades(new_grades, csv_path):
+    """
+    Save the grades to the CSV file, atomically.
+    Return False without writing anything if the file already has this content,
+    so that polling without changes costs no write.
+    """
+    content = new_grades.to_csv(index=False)
+    if os.path.exists(csv_path):
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            if f.read() == content:
+                return False
+    atomic_write(csv_path, content)
+    return True
+
+
+def append_history(diff, history_path):
+    """
+    Append the detected new grades to the diff history file (JSON lines).
+    """
+    entry = {
+        "detected_at": datetime.now(timezone.utc).isoformat(),
+        "count": len(diff),
+        "rows": json.loads(diff.to_json(orient="records", force_ascii=False)),
+    }
+    append_line(history_path, json.dumps(entry, ensure_ascii=False))
+
+
+class Journal:
+    """
+    Write-ahead journal of the notifications still to send (JSON lines).
+
+    A diff is recorded as pending before the grades file is replaced and marked
+    done once notified, so a run that crashes in between is resumed by the next
+    one from the journal alone. Only the delta is written; the file is emptied
+    as soon as nothing is pending.
+
+    Writers hold an exclusive lock (flock on a ".lock" file next to the journal,
+    which survives the compaction rename), so concurrent runs neither lose an
+    entry appended during a compaction nor recover the same entry twice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._depth = 0
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold the journal lock, reentrant within this instance.
+        """
+        with self._lock:
+            if self._depth == 0 and fcntl is not None:
+                self._lock_file = open(self.path + ".lock", "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and self._lock_file is not None:
+                    # Closing the file releases the flock
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _records(self):
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Line torn by a crash during the append: it was never acknowledged
+                    continue
+        return records
+
+    def pending(self):
+        """
+        Return the entries recorded but not marked done, oldest first.
+        Hold `lock()` while handling them so another run does not handle them too.
+        """
+        records = self._records()
+        done = {record["id"] for record in records if record["op"] == "done"}
+        return [record for record in records if record["op"] == "pending" and record["id"] not in done]
+
+    def begin(self, diff):
+        """
+        Record the rows of `diff` as pending and return the id of the entry.
+        """
+        entry_id = uuid.uuid4().hex
+        rows = json.loads(diff.to_json(orient="records", force_ascii=False))
+        with self.lock():
+            append_line(self.path, json.dumps({"id": entry_id, "op": "pending", "rows": rows}, ensure_ascii=False))
+        return entry_id
+
+    def commit(self, entry_id):
+        """
+        Mark the entry as done and compact the journal if nothing is pending anymore.
+        """
+        with self.lock():
+            append_line(self.path, json.dumps({"id": entry_id, "op": "done"}))
+            if not self.pending():
+                atomic_write(self.path, "")
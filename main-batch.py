@@ -0,0 +1,28 @@
+import argparse
+import os
+
+from grades_tracker import load_config
+from grades_tracker.batch import DEFAULT_FETCH_WORKERS, load_accounts, run_batch
+from grades_tracker.config import DIR_FILE
+from grades_tracker.log import setup_logging_from_config
+
+
+def main():
+    """
+    Main function to track the grades of several accounts (multi-student deployment).
+    Accounts are listed in a JSON file; SMTP settings are read from the .env file or the environment.
+    """
+    parser = argparse.ArgumentParser(description="Track the grades of every account listed in a JSON file.")
+    parser.add_argument("--accounts", default=os.path.join(DIR_FILE, "accounts.json"))
+    parser.add_argument("--fetch-workers", type=int, default=DEFAULT_FETCH_WORKERS)
+    parser.add_argument("--processes", type=int, default=None, help="Parse/diff worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    base_config = load_config()
+    setup_logging_from_config(base_config)
+    configs = load_accounts(args.accounts, base_config)
+    run_batch(configs, fetch_workers=args.fetch_workers, processes=args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+from grades_tracker.server import main
+
+
+if __name__ == "__main__":
+    main()
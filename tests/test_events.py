@@ -0,0 +1,66 @@
+import pandas as pd
+
+from grades_tracker.events import EventLog, change_events
+from grades_tracker.storage import load_grades, save_grades
+
+COLUMNS = ["anneeacademique", "ue", "cours", "epreuve", "coefficient", "note"]
+
+
+def html_grades(*rows):
+    """
+    Grades as parse_grades returns them from the HTML export: every cell is a string.
+    """
+    return pd.DataFrame([list(row) for row in rows], columns=COLUMNS)
+
+
+ROWS = [
+    ("2024-2025", "UE1", "Analyse", "Examen", "2", "12.50"),
+    ("2024-2025", "UE1", "Analyse", "Projet", "1", ""),
+    ("2024-2025", "UE2", "Physique", "Examen", "3", "15"),
+]
+
+
+def run(grades, csv_path):
+    old_grades = load_grades(csv_path, "fr")
+    events = change_events(grades, old_grades, "fr")
+    save_grades(grades, csv_path)
+    return events
+
+
+def test_first_run_adds_every_row(tmp_path):
+    events = run(html_grades(*ROWS), tmp_path / "grades.csv")
+    assert [event["type"] for event in events] == ["added"] * len(ROWS)
+
+
+def test_identical_run_emits_no_events(tmp_path):
+    csv_path = tmp_path / "grades.csv"
+    run(html_grades(*ROWS), csv_path)
+    assert run(html_grades(*ROWS), csv_path) == []
+
+
+def test_rows_sharing_a_key_emit_no_events(tmp_path):
+    csv_path = tmp_path / "grades.csv"
+    rows = ROWS + [("2024-2025", "UE1", "Analyse", "Examen", "2", "9")]
+    run(html_grades(*rows), csv_path)
+    assert run(html_grades(*rows), csv_path) == []
+    assert run(html_grades(*rows), csv_path) == []
+
+
+def test_changed_grade_is_updated(tmp_path):
+    csv_path = tmp_path / "grades.csv"
+    run(html_grades(*ROWS), csv_path)
+    graded = ("2024-2025", "UE1", "Analyse", "Projet", "1", "14")
+    events = run(html_grades(ROWS[0], graded, ROWS[2]), csv_path)
+    assert [event["type"] for event in events] == ["updated"]
+    assert events[0]["values"]["note"] == "14"
+    assert events[0]["previous"]["note"] is None
+
+
+def test_torn_event_is_skipped(tmp_path):
+    event_log = EventLog(tmp_path / "events.jsonl")
+    event_log.append([{"type": "added", "n": 1}])
+    with open(event_log.path, "ab") as f:
+        f.write(b'{"type": "add')
+    end = event_log.append([{"type": "added", "n": 2}])
+    assert [event["n"] for _, event in event_log.read(0)] == [1, 2]
+    assert list(event_log.read(0))[-1][0] == end
@@ -0,0 +1,71 @@
+import json
+
+import pandas as pd
+import pytest
+
+from grades_tracker import Config, Context, Pipeline, pipeline, storage
+
+COLUMNS = ["anneeacademique", "ue", "cours", "epreuve", "coefficient", "note"]
+ROWS = [
+    ("2024-2025", "UE1", "Analyse", "Examen", "2", "12.50"),
+    ("2024-2025", "UE2", "Physique", "Examen", "3", "15"),
+]
+NEW_ROW = ("2024-2025", "UE3", "Chimie", "Examen", "2", "11")
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(
+        "student",
+        "",
+        csv_path=str(tmp_path / "grades.csv"),
+        history_path=str(tmp_path / "history.jsonl"),
+        journal_path=str(tmp_path / "journal.jsonl"),
+        events_path=str(tmp_path / "events.jsonl"),
+    )
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    emails = []
+
+    def send_email(new_grades, config):
+        emails.append(list(new_grades["cours"]))
+        return True
+
+    monkeypatch.setattr(pipeline, "send_email", send_email)
+    return emails
+
+
+def run(config, *rows):
+    def parse(ctx):
+        ctx.grades = pd.DataFrame([list(row) for row in rows], columns=COLUMNS)
+
+    stages = Pipeline().only("recover", "parse", "diff", "persist", "notify").replace("parse", parse)
+    return stages.run(Context(config=config))
+
+
+def history_courses(config):
+    with open(config.history_path, encoding="utf-8") as f:
+        return [row["cours"] for line in f for row in json.loads(line)["rows"]]
+
+
+def test_crashed_run_is_notified_once_and_kept_in_history(config, sent, monkeypatch):
+    run(config, *ROWS)
+
+    def crash(new_grades, csv_path):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(storage, "save_grades", crash)
+        with pytest.raises(OSError):
+            run(config, *ROWS, NEW_ROW)
+
+    ctx = run(config, *ROWS, NEW_ROW)
+
+    assert sent == [["Analyse", "Physique"], ["Chimie"]]
+    assert list(ctx.diff["cours"]) == ["Chimie"]
+    assert ctx.unnotified.empty
+    # Written by the crashed run before the grades file, then again by the rerun
+    assert history_courses(config).count("Chimie") == 2
+    assert storage.Journal(config.journal_path).pending() == []